@@ -0,0 +1,256 @@
+import json
+import os
+import queue
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from crat.settings import config
+
+RPC = 'node_rpc'
+ORM = 'orm'
+SIGNING = 'signing'
+RENDERING = 'rendering'
+OTHER = 'other'
+
+_local = threading.local()
+
+
+def _current_capture():
+    return getattr(_local, 'capture', None)
+
+
+@contextmanager
+def timed(category: str):
+    capture = _current_capture()
+    if capture is None:
+        yield
+        return
+
+    previous_category = capture.category
+    capture.category = category
+    started_at = time.perf_counter()
+    try:
+        yield
+    finally:
+        capture.timings[category] += time.perf_counter() - started_at
+        capture.category = previous_category
+
+
+def rpc_timing_middleware(make_request, w3):
+    def middleware(method, params):
+        with timed(RPC):
+            return make_request(method, params)
+
+    return middleware
+
+
+def orm_timing_wrapper(execute, sql, params, many, context):
+    with timed(ORM):
+        return execute(sql, params, many, context)
+
+
+class Capture:
+    def __init__(self, request, sampled: bool):
+        self.method = request.method
+        self.path = request.path
+        self.sampled = sampled
+        self.thread_id = threading.get_ident()
+        self.started_at = time.perf_counter()
+        self.category = None
+        self.timings = defaultdict(float)
+        self.stacks = Counter()
+
+    def stack_key(self, frame) -> tuple:
+        codes = []
+        while frame is not None:
+            codes.append(frame.f_code)
+            frame = frame.f_back
+        return self.category or OTHER, tuple(codes)
+
+    def folded_stacks(self):
+        for (category, codes), count in self.stacks.items():
+            frames = [f'[{category}]']
+            frames.extend(
+                f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'
+                for code in reversed(codes)
+            )
+            yield ';'.join(frames), count
+
+
+class Sampler(threading.Thread):
+    """
+    Single background thread walking the stacks of all in-flight requests.
+    It sleeps on an event while there is nothing to sample.
+    """
+
+    def __init__(self, interval: float):
+        super().__init__(name='crat-profiler', daemon=True)
+        self.interval = interval
+        self.captures = {}
+        self.lock = threading.Lock()
+        self.has_captures = threading.Event()
+
+    def register(self, capture: Capture) -> None:
+        with self.lock:
+            self.captures[capture.thread_id] = capture
+            self.has_captures.set()
+
+    def unregister(self, capture: Capture) -> None:
+        with self.lock:
+            self.captures.pop(capture.thread_id, None)
+            if not self.captures:
+                self.has_captures.clear()
+
+    def run(self) -> None:
+        while True:
+            self.has_captures.wait()
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            with self.lock:
+                captures = list(self.captures.values())
+
+            samples = []
+            for capture in captures:
+                frame = frames.get(capture.thread_id)
+                if frame is not None:
+                    samples.append((capture, capture.stack_key(frame)))
+            del frames
+
+            # Only count samples for captures that are still registered, so a
+            # finished capture is never mutated while it is being dumped.
+            with self.lock:
+                for capture, key in samples:
+                    if self.captures.get(capture.thread_id) is capture:
+                        capture.stacks[key] += 1
+
+
+class DumpWriter(threading.Thread):
+    """
+    Writes triggered captures to disk and rotates old dumps, so slow requests
+    do not also pay for file IO. Captures are dropped when the queue is full.
+    """
+
+    def __init__(self, dump_dir: str, max_dumps: int):
+        super().__init__(name='crat-profiler-writer', daemon=True)
+        self.dump_dir = dump_dir
+        self.max_dumps = max_dumps
+        self.queue = queue.Queue(maxsize=100)
+
+    def submit(self, capture: Capture, duration: float, status_code: int) -> None:
+        try:
+            self.queue.put_nowait((capture, duration, status_code))
+        except queue.Full:
+            pass
+
+    def run(self) -> None:
+        while True:
+            capture, duration, status_code = self.queue.get()
+            try:
+                self.dump(capture, duration, status_code)
+                self.rotate()
+            except OSError as e:
+                print('cannot write profile', e)
+
+    def dump(self, capture: Capture, duration: float, status_code: int) -> None:
+        os.makedirs(self.dump_dir, exist_ok=True)
+
+        path_slug = re.sub(r'[^A-Za-z0-9]+', '_', capture.path).strip('_')[:60]
+        name = '{:%Y%m%dT%H%M%S%f}-{}-{}-{}ms'.format(
+            datetime.utcnow(), capture.method, path_slug, int(duration * 1000)
+        )
+        base_path = os.path.join(self.dump_dir, name)
+
+        with open(base_path + '.folded', 'w') as f:
+            for stack, count in capture.folded_stacks():
+                f.write(f'{stack} {count}\n')
+
+        timings_ms = {category: seconds * 1000 for category, seconds in capture.timings.items()}
+        timings_ms[OTHER] = max(duration * 1000 - sum(timings_ms.values()), 0)
+        with open(base_path + '.json', 'w') as f:
+            json.dump({
+                'method': capture.method,
+                'path': capture.path,
+                'status_code': status_code,
+                'duration_ms': duration * 1000,
+                'sampled': capture.sampled,
+                'timings_ms': timings_ms,
+            }, f, indent=2)
+
+    def rotate(self) -> None:
+        names = sorted(name[:-len('.folded')] for name in os.listdir(self.dump_dir) if name.endswith('.folded'))
+        for name in names[:-self.max_dumps]:
+            for extension in ('.folded', '.json'):
+                try:
+                    os.remove(os.path.join(self.dump_dir, name + extension))
+                except FileNotFoundError:
+                    pass
+
+
+class ProfilingMiddleware:
+    """
+    Opt-in request profiler. Requests are sampled at `sample_rate` and always
+    dumped when slower than `slow_request_threshold_ms`. Each dump is a pair of
+    files in `dump_dir`: collapsed stacks (`.folded`, readable by flamegraph.pl
+    and speedscope) and a `.json` summary with time split by category.
+    `node_rpc` covers the whole web3 call, including eth_call cache lookups.
+    """
+
+    def __init__(self, get_response):
+        settings = config.profiling
+        if settings is None or not settings.enabled:
+            raise MiddlewareNotUsed()
+
+        self.get_response = get_response
+        self.settings = settings
+        self.threshold = settings.slow_request_threshold_ms / 1000
+
+        for chain in config.chains:
+            for w3 in (chain.w3, chain.cached_w3):
+                # Outermost, so waiting on another request's in-flight call in the
+                # eth_call cache is counted as node RPC time too
+                if 'profiling' not in w3.middleware_onion:
+                    w3.middleware_onion.add(rpc_timing_middleware, name='profiling')
+
+        self.sampler = Sampler(settings.sampling_interval_ms / 1000)
+        self.sampler.start()
+        self.writer = DumpWriter(settings.dump_dir, settings.max_dumps)
+        self.writer.start()
+
+    def __call__(self, request):
+        capture = Capture(request, sampled=random.random() < self.settings.sample_rate)
+        _local.capture = capture
+        self.sampler.register(capture)
+        try:
+            with connection.execute_wrapper(orm_timing_wrapper):
+                response = self.get_response(request)
+        finally:
+            self.sampler.unregister(capture)
+            _local.capture = None
+
+        duration = time.perf_counter() - capture.started_at
+        if capture.sampled or duration >= self.threshold:
+            self.writer.submit(capture, duration, response.status_code)
+
+        return response
+
+    def process_template_response(self, request, response):
+        capture = _current_capture()
+        if capture is None:
+            return response
+
+        capture.category = RENDERING
+        started_at = time.perf_counter()
+
+        def finish_rendering(rendered_response):
+            capture.timings[RENDERING] += time.perf_counter() - started_at
+            capture.category = None
+
+        response.add_post_render_callback(finish_rendering)
+        return response
@@ -1,4 +1,8 @@
+import json
+import threading
+import time
 from dataclasses import dataclass, field
+from eth_account import Account
 from typing import List, Optional
 from web3 import Web3, HTTPProvider, contract
 from web3.types import ChecksumAddress
@@ -20,35 +24,180 @@ class Stage:
 
 
 @dataclass
-class Config:
-    django_secret_key: str
-    django_static_url: str
-    django_allowed_hosts: List[str]
-    crowdsale_contract_address: str
-    crowdsale_contract_abi: str
-    token_decimals: int
-    private_key: str
-    cryptocompare_api_url: str
+class Profiling:
+    enabled: bool = False
+    sample_rate: float = 0.0
+    slow_request_threshold_ms: int = 1000
+    sampling_interval_ms: int = 5
+    dump_dir: str = 'profiles'
+    max_dumps: int = 100
+
+    def __post_init__(self):
+        if not 0 <= self.sample_rate <= 1:
+            raise ValueError('Profiling sample_rate must be between 0 and 1')
+
+        for name in ('slow_request_threshold_ms', 'sampling_interval_ms', 'max_dumps'):
+            if getattr(self, name) <= 0:
+                raise ValueError(f'Profiling {name} must be positive')
+
+
+def construct_call_cache_middleware(cache_expire_seconds: int):
+    """
+    Time based `eth_call` cache shared by every request using the Web3 instance.
+    Concurrent misses for the same call wait for the first one instead of all
+    going to the node. Error responses are not cached; waiters whose owner
+    failed make the call themselves.
+    """
+    cache = {}
+    in_flight = {}
+    lock = threading.Lock()
+
+    def call_cache_middleware(make_request, w3):
+        def middleware(method, params):
+            if method != 'eth_call':
+                return make_request(method, params)
+
+            key = json.dumps(params, sort_keys=True, default=str)
+            with lock:
+                cached = cache.get(key)
+                if cached is not None and cached[0] > time.monotonic():
+                    return cached[1]
+                pending = in_flight.get(key)
+                is_owner = pending is None
+                if is_owner:
+                    pending = in_flight[key] = threading.Event()
+
+            if not is_owner:
+                # The owner always sets the event, at the latest when its request
+                # hits the provider timeout, so waiting without a cap is safe
+                pending.wait()
+                with lock:
+                    cached = cache.get(key)
+                if cached is not None and cached[0] > time.monotonic():
+                    return cached[1]
+                return make_request(method, params)
+
+            try:
+                response = make_request(method, params)
+                if 'error' not in response and response.get('result') is not None:
+                    now = time.monotonic()
+                    with lock:
+                        for expired_key in [k for k, (expires_at, _) in cache.items() if expires_at <= now]:
+                            del cache[expired_key]
+                        cache[key] = (now + cache_expire_seconds, response)
+                return response
+            finally:
+                with lock:
+                    del in_flight[key]
+                pending.set()
+
+        return middleware
+
+    return call_cache_middleware
+
+
+@dataclass
+class Chain:
+    name: str
     node: str
-    signature_expiration_timeout_minutes: int
-    rates_update_timeout_minutes: int
-    tokens: List[Token]
-    stages: List[Stage]
-    debug: Optional[bool] = False
-    crowdsale_contract: contract = field(init=False, default=None)
+    rpc_cache_seconds: int = 3
     w3: Web3 = field(init=False, default=None)
+    cached_w3: Web3 = field(init=False, default=None)
 
     def __post_init__(self):
         self.w3 = Web3(HTTPProvider(self.node))
         self.w3.middleware_onion.inject(geth_poa_middleware, layer=0)
-        crowdsale_address_checksum = Web3.toChecksumAddress(self.crowdsale_contract_address)
-        self.crowdsale_contract = self.w3.eth.contract(
-            address=crowdsale_address_checksum,
-            abi=self.crowdsale_contract_abi,
+        if not self.rpc_cache_seconds:
+            self.cached_w3 = self.w3
+            return
+
+        # Only for read-only views, pricing and signing must use the uncached w3.
+        # It needs its own provider: web3 caches the built middleware chain on
+        # the provider, so a shared one could hand the cached chain to w3.
+        # The requests session is still shared per endpoint URI by web3.
+        self.cached_w3 = Web3(HTTPProvider(self.node))
+        self.cached_w3.middleware_onion.inject(geth_poa_middleware, layer=0)
+        self.cached_w3.middleware_onion.add(
+            construct_call_cache_middleware(self.rpc_cache_seconds),
+            name='call_cache',
         )
 
+
+@dataclass
+class Sale:
+    name: str
+    chain: str
+    crowdsale_contract_address: str
+    crowdsale_contract_abi: str
+    token_decimals: int
+    private_key: str
+    tokens: List[Token]
+    stages: List[Stage]
+    crowdsale_contract: contract = field(init=False, default=None)
+    cached_crowdsale_contract: contract = field(init=False, default=None)
+
     def get_token_by_address(self, address: ChecksumAddress):
         try:
             return [token for token in self.tokens if token.address == address][0]
         except IndexError:
             raise ValueError(f'Cannot find token with address {address}')
+
+
+@dataclass
+class Config:
+    django_secret_key: str
+    django_static_url: str
+    django_allowed_hosts: List[str]
+    cryptocompare_api_url: str
+    signature_expiration_timeout_minutes: int
+    rates_update_timeout_minutes: int
+    chains: List[Chain]
+    sales: List[Sale]
+    debug: Optional[bool] = False
+    profiling: Optional[Profiling] = None
+
+    def __post_init__(self):
+        chain_names = [chain.name for chain in self.chains]
+        if len(chain_names) != len(set(chain_names)):
+            raise ValueError('Chain names must be unique')
+
+        if not self.sales:
+            raise ValueError('At least one sale must be configured')
+
+        sale_names = [sale.name for sale in self.sales]
+        if len(sale_names) != len(set(sale_names)):
+            raise ValueError('Sale names must be unique')
+
+        # The signed message carries no contract address or chain id, so a
+        # shared signer would let a signature from one sale be redeemed on another
+        signers = [Account.from_key(sale.private_key).address for sale in self.sales]
+        if len(signers) != len(set(signers)):
+            raise ValueError('Sale private keys must be unique')
+
+        for sale in self.sales:
+            chain = self.get_chain_by_name(sale.chain)
+            crowdsale_address_checksum = Web3.toChecksumAddress(sale.crowdsale_contract_address)
+            sale.crowdsale_contract = chain.w3.eth.contract(
+                address=crowdsale_address_checksum,
+                abi=sale.crowdsale_contract_abi,
+            )
+            sale.cached_crowdsale_contract = chain.cached_w3.eth.contract(
+                address=crowdsale_address_checksum,
+                abi=sale.crowdsale_contract_abi,
+            )
+
+    @property
+    def cryptocompare_symbols(self) -> List[str]:
+        return sorted({token.cryptocompare_symbol for sale in self.sales for token in sale.tokens})
+
+    def get_chain_by_name(self, name: str) -> Chain:
+        try:
+            return [chain for chain in self.chains if chain.name == name][0]
+        except IndexError:
+            raise ValueError(f'Cannot find chain with name {name}')
+
+    def get_sale_by_name(self, name: str) -> Sale:
+        try:
+            return [sale for sale in self.sales if sale.name == name][0]
+        except IndexError:
+            raise ValueError(f'Cannot find sale with name {name}')
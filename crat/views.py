@@ -1,9 +1,11 @@
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
+from rest_framework.exceptions import NotFound
 from crat.settings import config
 from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 from datetime import datetime
+from typing import Optional
 from crat.models import UsdRate, Investor
 from web3 import Web3
 from django.core.exceptions import ValidationError
@@ -11,6 +13,8 @@ from django.db.utils import IntegrityError
 from django.core.validators import validate_email
 from datetime import datetime, timedelta
 from eth_account import Account, messages
+from crat.profiling import timed, SIGNING
+from crat.utils import Sale
 
 
 current_stage_response = openapi.Response(
@@ -29,6 +33,16 @@ current_stage_response = openapi.Response(
     )
 )
 
+sale_not_found_response = openapi.Response(
+    description='Sale with this name is not configured',
+    schema=openapi.Schema(
+        type=openapi.TYPE_OBJECT,
+        properties={
+            'detail': openapi.Schema(type=openapi.TYPE_STRING),
+        },
+    )
+)
+
 crowdsale_ended_response = openapi.Response(
     description='Сrowdsale is over',
     schema=openapi.Schema(
@@ -40,14 +54,59 @@ crowdsale_ended_response = openapi.Response(
 )
 
 
+def get_sale(sale_name: Optional[str]) -> Sale:
+    # Routes without a sale name are kept for clients of the single sale API
+    if sale_name is None:
+        return config.sales[0]
+
+    try:
+        return config.get_sale_by_name(sale_name)
+    except ValueError:
+        raise NotFound('SALE_NOT_FOUND')
+
+
+@swagger_auto_schema(
+    method='GET',
+    operation_description='Sales view',
+    responses={
+        200: openapi.Response(
+            description='Configured sales response',
+            schema=openapi.Schema(
+                type=openapi.TYPE_ARRAY,
+                items=openapi.Items(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        'name': openapi.Schema(type=openapi.TYPE_STRING),
+                        'chain': openapi.Schema(type=openapi.TYPE_STRING),
+                        'crowdsale_contract_address': openapi.Schema(type=openapi.TYPE_STRING),
+                    },
+                )
+            )
+        ),
+    }
+)
+@api_view(http_method_names=['GET'])
+def sales_view(request):
+    return Response([
+        {
+            'name': sale.name,
+            'chain': sale.chain,
+            'crowdsale_contract_address': sale.crowdsale_contract_address,
+        }
+        for sale in config.sales
+    ])
+
+
 @swagger_auto_schema(
     method='GET',
     operation_description='Stage data view',
-    responses={200: current_stage_response}
+    responses={200: current_stage_response, 404: sale_not_found_response}
 )
 @api_view(http_method_names=['GET'])
-def stage_view(request):
-    contract = config.crowdsale_contract
+def stage_view(request, sale_name=None):
+    sale = get_sale(sale_name)
+
+    contract = sale.cached_crowdsale_contract
     current_stage_index = contract.functions.determineStage().call()
 
     crowdsale_start_time = contract.functions.startTime().call()
@@ -56,12 +115,12 @@ def stage_view(request):
         return Response({'status': 'NOT_STARTED'})
 
     next_stage_index = current_stage_index + 1
-    if current_stage_index == len(config.stages):
+    if current_stage_index == len(sale.stages):
         return Response({'status': 'ENDED'})
-    if current_stage_index + 1 == len(config.stages):
+    if current_stage_index + 1 == len(sale.stages):
         next_stage_price_usd = None
     else:
-        next_stage_price_usd = config.stages[next_stage_index].price
+        next_stage_price_usd = sale.stages[next_stage_index].price
 
     stage_end_timestamp = contract.functions.STAGES(current_stage_index).call()
 
@@ -73,14 +132,14 @@ def stage_view(request):
     current_stage_tokens_sold = contract.functions.amounts(current_stage_index).call()
     current_stage_tokens_limit = contract.functions.LIMITS(current_stage_index).call()
 
-    current_price_usd = config.stages[current_stage_index].price
+    current_price_usd = sale.stages[current_stage_index].price
 
     return Response({
         'status': 'ACTIVE',
         'current_stage_price_usd': current_price_usd,
         'current_stage_number': current_stage_index + 1,
         'current_stage_days_left':  current_stage_days_left,
-        'current_stage_tokens_sold': current_stage_tokens_sold // (10 ** config.token_decimals),
+        'current_stage_tokens_sold': current_stage_tokens_sold // (10 ** sale.token_decimals),
         'current_stage_tokens_limit': current_stage_tokens_limit * (10 ** 5),
         'next_stage_price_usd': next_stage_price_usd,
     })
@@ -105,11 +164,14 @@ def stage_view(request):
                 )
             )
         ),
+        404: sale_not_found_response,
     }
 )
 @api_view(http_method_names=['GET'])
-def stages_view(request):
-    contract = config.crowdsale_contract
+def stages_view(request, sale_name=None):
+    sale = get_sale(sale_name)
+
+    contract = sale.cached_crowdsale_contract
     current_stage_index = contract.functions.determineStage().call()
     crowdsale_start_time = contract.functions.startTime().call()
     tokens_limits = contract.functions.allLimits().call()
@@ -124,7 +186,7 @@ def stages_view(request):
         else:
             status = 'ACTIVE'
 
-        stage = config.stages[i]
+        stage = sale.stages[i]
         result.append({
             'status': status,
             'price': stage.price,
@@ -154,12 +216,15 @@ def stages_view(request):
                 )
             )
         ),
+        404: sale_not_found_response,
     }
 )
 @api_view(http_method_names=['GET'])
-def tokens_view(request):
+def tokens_view(request, sale_name=None):
+    sale = get_sale(sale_name)
+
     response = []
-    for token in config.tokens:
+    for token in sale.tokens:
         try:
             price = UsdRate.objects.get(symbol=token.cryptocompare_symbol).value
         except UsdRate.DoesNotExist:
@@ -299,44 +364,48 @@ def is_whitelisted_view(request, address):
                 },
             )
         ),
+        404: sale_not_found_response,
     }
 )
 @api_view(http_method_names=['POST'])
-def signature_view(request):
+def signature_view(request, sale_name=None):
+    sale = get_sale(sale_name)
+
     data = request.data
     token_address = data['token_address']
     amount_to_pay = int(data['amount_to_pay'])
 
     try:
         token_address_checksum = Web3.toChecksumAddress(token_address)
-        token = config.get_token_by_address(token_address_checksum)
+        token = sale.get_token_by_address(token_address_checksum)
     except ValueError:
         return Response({'detail': 'INVALID_TOKEN_ADDRESS'}, status=400)
 
-    contract = config.crowdsale_contract
+    contract = sale.crowdsale_contract
     crowdsale_start_time = contract.functions.startTime().call()
 
     if not crowdsale_start_time:
         return Response({'detail': 'NOT_STARTED'}, status=400)
 
     current_stage_index = contract.functions.determineStage().call()
-    current_price = config.stages[current_stage_index].price
+    current_price = sale.stages[current_stage_index].price
 
     usd_rate = UsdRate.objects.get(symbol=token.cryptocompare_symbol)
     usd_amount_to_pay = amount_to_pay / usd_rate.value
-    decimals = 10 ** (config.token_decimals - token.decimals)
+    decimals = 10 ** (sale.token_decimals - token.decimals)
     amount_to_receive = int(usd_amount_to_pay / current_price * decimals)
 
     signature_expires_at = datetime.now() + timedelta(minutes=config.signature_expiration_timeout_minutes)
     signature_expiration_timestamp = int(signature_expires_at.timestamp())
     print([token_address_checksum, amount_to_pay, amount_to_receive, signature_expiration_timestamp])
-    keccak_hex = Web3.solidityKeccak(
-        ['address', 'uint256', 'uint256', 'uint256'],
-        [token_address_checksum, amount_to_pay, amount_to_receive, signature_expiration_timestamp]
-    ).hex()
-
-    message_to_sign = messages.encode_defunct(hexstr=keccak_hex)
-    signature = Account.sign_message(message_to_sign, private_key=config.private_key)
+    with timed(SIGNING):
+        keccak_hex = Web3.solidityKeccak(
+            ['address', 'uint256', 'uint256', 'uint256'],
+            [token_address_checksum, amount_to_pay, amount_to_receive, signature_expiration_timestamp]
+        ).hex()
+
+        message_to_sign = messages.encode_defunct(hexstr=keccak_hex)
+        signature = Account.sign_message(message_to_sign, private_key=sale.private_key)
 
     return Response({
         'token_address': token_address_checksum,